@@ -1,11 +1,21 @@
 # Import everything from the standalone planner module
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import List, Optional, Tuple, Union
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from math import ceil
-import requests, os
+import asyncio
+import logging
+import string
+import time
+import httpx, os
+from cachetools import LRUCache, TTLCache
 
 # Optional: Groq import handled lazily
 try:
@@ -14,12 +24,30 @@ try:
 except Exception:
     HAS_GROQ = False
 
+# Optional: orjson decodes upstream payloads several times faster than json
+try:
+    import orjson
+    json_loads = orjson.loads
+    HAS_ORJSON = True
+except Exception:
+    import json
+    json_loads = json.loads
+    HAS_ORJSON = False
+
 # Load environment variables from .env
 from dotenv import load_dotenv
 env_path = os.path.join(os.path.dirname(__file__), '..', '.env')
 load_dotenv(dotenv_path=env_path)
 
-app = FastAPI(title="Travel Planner")
+# LOG_LEVEL applies to our logger only; the root stays at WARNING so library INFO lines
+# (httpx logs full request URLs, including the OpenWeather appid) are never emitted
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger("travel_planner")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
+for _name in ("httpx", "httpcore"):
+    logging.getLogger(_name).setLevel(logging.WARNING)
+
+app = FastAPI(title="Travel Planner", default_response_class=ORJSONResponse if HAS_ORJSON else JSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,9 +65,128 @@ OPENWEATHER_KEY = os.getenv("OPENWEATHER_API_KEY")
 GROQ_KEY = os.getenv("GROQ_API_KEY") 
 
 GOOGLE_PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-OW_GEOCODE_URL = "http://api.openweathermap.org/geo/1.0/direct"
+OW_GEOCODE_URL = "https://api.openweathermap.org/geo/1.0/direct"  # https so it shares the OneCall HTTP/2 connection
 OW_ONECALL_URL = "https://api.openweathermap.org/data/3.0/onecall"
 
+# Overall time budget (seconds) for upstream calls made by one /plan request
+PLAN_BUDGET_S = 8.0
+
+# Overpass query: traveler-specific amenity lines are substituted into $amen
+OVERPASS_TMPL = string.Template("""[out:json][timeout:25];
+(
+$amen
+  node["tourism"="attraction"](around:8000,$lat,$lng);
+  node["tourism"="museum"](around:8000,$lat,$lng);
+  node["amenity"="restaurant"](around:5000,$lat,$lng);
+  node["amenity"="cafe"](around:5000,$lat,$lng);
+);
+out center meta;
+""")
+_AMEN_LINE = '  node["{k}"="{v}"](around:5000,{lat},{lng});'
+
+TIME_PARTS = ("Morning", "Afternoon", "Evening")
+
+# Weather description keyword → emoji, checked in order
+_WEATHER_EMOJI = (
+    ("thunderstorm", "⛈️"),
+    ("rain", "🌧️"),
+    ("snow", "🌨️"),
+    ("cloud", "☁️"),
+    ("clear", "☀️"),
+    ("sun", "☀️"),
+)
+
+# -------------------------
+# Shared HTTP client
+# -------------------------
+class HttpBatcher:
+    """Collect outbound requests over a short window and send each batch concurrently."""
+
+    def __init__(self, client: httpx.AsyncClient, max_batch=32, max_wait_ms=5, concurrency=16):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = asyncio.Queue()
+        self._sem = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self._worker = None
+
+    def start(self):
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, *self._tasks, return_exceptions=True)
+
+    async def submit(self, method: str, url: str, **kwargs) -> httpx.Response:
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fut, method, url, kwargs))
+        return await fut
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            task = asyncio.create_task(self._send_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, batch):
+        await asyncio.gather(*(self._send(*item) for item in batch))
+
+    async def _send(self, fut, method, url, kwargs):
+        if fut.done():  # caller already gave up
+            return
+        async with self._sem:
+            if fut.done():  # gave up while queued on the semaphore
+                return
+            req = asyncio.ensure_future(self.client.request(method, url, **kwargs))
+            # A caller that runs out of budget cancels fut; abort the request with it so it
+            # stops holding a semaphore slot and a pooled connection
+            fut.add_done_callback(lambda f: req.cancel() if f.cancelled() else None)
+            try:
+                r = await req
+            except asyncio.CancelledError:
+                if fut.cancelled():
+                    return
+                raise
+            except Exception as e:
+                if not fut.done():
+                    fut.set_exception(e)
+            else:
+                if not fut.done():
+                    fut.set_result(r)
+
+# Created on startup so every request reuses the same connection pool.
+http_client: Optional[httpx.AsyncClient] = None
+http_batcher: Optional[HttpBatcher] = None
+
+@app.on_event("startup")
+async def open_http_client():
+    global http_client, http_batcher
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        retries=2,  # connection-level retries only
+    )
+    # Tight connect/pool timeouts so a slow mirror cannot hold a pool slot
+    timeout = httpx.Timeout(connect=2.0, read=8.0, write=2.0, pool=1.0)
+    # No Accept-Encoding override: httpx advertises br only when a brotli decoder is installed
+    headers = {"User-Agent": "TravelPlanner/1.0"}
+    http_client = httpx.AsyncClient(timeout=timeout, transport=transport, headers=headers)
+    http_batcher = HttpBatcher(http_client)
+    http_batcher.start()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    if http_batcher is not None:
+        await http_batcher.stop()
+    if http_client is not None:
+        await http_client.aclose()
+
 # -------------------------
 # Models
 # -------------------------
@@ -53,6 +200,18 @@ class PlanRequest(BaseModel):
     stay_lng: Optional[float] = None
     use_groq: bool = False
 
+@dataclass
+class PlaceRecord:
+    """Lightweight place record used internally; converted to PlaceInfo only when emitted."""
+    __slots__ = ("id", "name", "lat", "lng", "rating", "categories", "address")
+    id: Union[int, str, None]
+    name: str
+    lat: Optional[float]
+    lng: Optional[float]
+    rating: Optional[float]
+    categories: Tuple[str, ...]
+    address: str
+
 class PlaceInfo(BaseModel):
     name: str
     lat: Optional[float] = None
@@ -84,11 +243,32 @@ class PlanResponse(BaseModel):
 # -------------------------
 # Helpers
 # -------------------------
-def geocode_location(place: str):
+def remaining_budget(deadline: float) -> float:
+    """Seconds left before `deadline` (time.monotonic), never less than half a second."""
+    return max(0.5, deadline - time.monotonic())
+
+# Geocodes keyed by normalized destination; failures are not cached
+_geocode_cache = LRUCache(maxsize=4096)
+
+async def geocode_location(place: str, timeout: float = 10.0):
+    """Geocode a destination, serving repeat lookups from an in-process cache."""
+    key = place.strip().lower()
+    hit = _geocode_cache.get(key)
+    if hit is not None:
+        return hit
+    geo = await _geocode_uncached(key, timeout)
+    if geo is not None:
+        _geocode_cache[key] = geo
+    return geo
+
+async def _geocode_uncached(place: str, timeout: float):
     """Try OpenWeather geocoding, fallback to Nominatim."""
+    deadline = time.monotonic() + timeout
     if OPENWEATHER_KEY:
         try:
-            r = requests.get(OW_GEOCODE_URL, params={"q": place, "limit": 1, "appid": OPENWEATHER_KEY}, timeout=10)
+            r = await asyncio.wait_for(
+                http_batcher.submit("GET", OW_GEOCODE_URL, params={"q": place, "limit": 1, "appid": OPENWEATHER_KEY}),
+                timeout=remaining_budget(deadline))
             if r.status_code == 200:
                 j = r.json()
                 if j:
@@ -98,10 +278,10 @@ def geocode_location(place: str):
 
     # Nominatim fallback
     try:
-        r = requests.get("https://nominatim.openstreetmap.org/search",
-                          params={"q": place, "format": "json", "limit": 1},
-                          headers={"User-Agent": "TravelPlanner/1.0"},
-                          timeout=10)
+        r = await asyncio.wait_for(
+            http_batcher.submit("GET", "https://nominatim.openstreetmap.org/search",
+                                params={"q": place, "format": "json", "limit": 1}),
+            timeout=remaining_budget(deadline))
         if r.status_code == 200:
             j = r.json()
             if j:
@@ -111,62 +291,112 @@ def geocode_location(place: str):
 
     return None
 
-def osm_search_places(lat, lng, traveler_type="solo", limit=20):
+# Upstream responses keyed on coarse (~1 km) coordinates; fallbacks are not cached
+_osm_cache = TTLCache(maxsize=1024, ttl=24 * 3600)
+_weather_cache = TTLCache(maxsize=1024, ttl=30 * 60)
+
+# Upstream calls currently in flight, so identical concurrent requests share one
+_inflight = {}
+
+async def _single_flight(key, fetch):
+    """Await fetch() once per key; concurrent callers with the same key get its result."""
+    task = _inflight.get(key)
+    if task is None:
+        # Detached task: cancelling any one caller (owner included) never cancels the peers
+        task = asyncio.ensure_future(fetch())
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _single_flight_done(key, t))
+    return await asyncio.shield(task)
+
+def _single_flight_done(key, task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved when every caller has gone away
+
+# Map traveler type → OSM amenity/tourism types
+AMENITY_MAP = MappingProxyType({
+    "solo": ("museum", "library", "cafe", "park", "viewpoint", "monument"),
+    "nuclear family": ("zoo", "amusement_park", "playground", "park", "museum", "restaurant"),
+    "joint family": ("temple", "place_of_worship", "park", "restaurant", "tourist_attraction"),
+    "family": ("zoo", "park", "museum", "playground", "restaurant", "tourist_attraction"),
+    "couple": ("restaurant", "cafe", "spa", "viewpoint", "bar", "tourist_attraction"),
+    "friends": ("bar", "pub", "restaurant", "nightclub", "cafe", "tourist_attraction"),
+})
+_DEFAULT_AMENS = ("tourist_attraction", "restaurant", "cafe")
+
+# Filler places as (name, lat offset, lng offset, category) around the destination:
+# GENERIC_PLACES pads thin Overpass results, FALLBACK_PLACES replaces a failed query.
+GENERIC_PLACES = (
+    ("Local Market", 0.01, 0.01, "Shopping"),
+    ("City Center", 0.0, 0.0, "Sightseeing"),
+    ("Local Restaurant", -0.01, -0.01, "Dining"),
+    ("Scenic Viewpoint", 0.02, 0.02, "Nature"),
+    ("Cultural Site", -0.02, 0.01, "Culture"),
+)
+FALLBACK_PLACES = (
+    ("Main Tourist Attraction", 0.0, 0.0, "Attraction"),
+    ("Popular Restaurant", 0.005, 0.005, "Restaurant"),
+    ("Local Cafe", -0.005, -0.005, "Cafe"),
+    ("Shopping Area", 0.01, -0.01, "Shopping"),
+    ("Cultural Center", -0.01, 0.01, "Culture"),
+)
+
+async def osm_search_places(lat, lng, traveler_type="solo", limit=20, timeout=20.0):
     """Fetch places using OpenStreetMap Overpass API - completely free!"""
-    
-    # Map traveler type → OSM amenity/tourism types
-    amenity_map = {
-        "solo": ["museum", "library", "cafe", "park", "viewpoint", "monument"],
-        "nuclear family": ["zoo", "amusement_park", "playground", "park", "museum", "restaurant"],
-        "joint family": ["temple", "place_of_worship", "park", "restaurant", "tourist_attraction"],
-        "family": ["zoo", "park", "museum", "playground", "restaurant", "tourist_attraction"],
-        "couple": ["restaurant", "cafe", "spa", "viewpoint", "bar", "tourist_attraction"],
-        "friends": ["bar", "pub", "restaurant", "nightclub", "cafe", "tourist_attraction"],
-    }
-    amenities = amenity_map.get(traveler_type.lower(), ["tourist_attraction", "restaurant", "cafe"])
-    
-    # Create Overpass API query
-    amenity_queries = []
-    for amenity in amenities[:3]:  # Limit to avoid too complex queries
-        amenity_queries.append(f'node["amenity"="{amenity}"](around:5000,{lat},{lng});')
-        amenity_queries.append(f'node["tourism"="{amenity}"](around:5000,{lat},{lng});')
+    cache_key = (round(lat, 2), round(lng, 2), traveler_type.lower(), limit)
+    hit = _osm_cache.get(cache_key)
+    if hit is not None:
+        return hit
+    return await _single_flight(
+        ("osm",) + cache_key,
+        lambda: _fetch_osm_places(lat, lng, traveler_type, limit, timeout, cache_key))
+
+async def _fetch_osm_places(lat, lng, traveler_type, limit, timeout, cache_key):
+    amenities = AMENITY_MAP.get(traveler_type.lower(), _DEFAULT_AMENS)
     
     # Overpass query to get points of interest around the location
-    overpass_query = f"""
-[out:json][timeout:25];
-(
-  {''.join(amenity_queries)}
-  node["tourism"="attraction"](around:8000,{lat},{lng});
-  node["tourism"="museum"](around:8000,{lat},{lng});
-  node["amenity"="restaurant"](around:5000,{lat},{lng});
-  node["amenity"="cafe"](around:5000,{lat},{lng});
-);
-out center meta;
-"""
+    amen = "\n".join(_AMEN_LINE.format(k=k, v=a, lat=lat, lng=lng)
+                     for a in amenities[:3]  # Limit to avoid too complex queries
+                     for k in ("amenity", "tourism"))
+    overpass_query = OVERPASS_TMPL.substitute(amen=amen, lat=lat, lng=lng)
     
     try:
-        r = requests.post(
-            "https://overpass-api.de/api/interpreter",
-            data=overpass_query,
-            headers={"User-Agent": "TravelPlanner/1.0"},
-            timeout=20
+        r = await asyncio.wait_for(
+            http_batcher.submit(
+                "POST",
+                "https://overpass-api.de/api/interpreter",
+                content=overpass_query,
+            ),
+            timeout=timeout,
         )
         r.raise_for_status()
-        data = r.json()
+        data = json_loads(r.content)
         
         results = []
-        seen_names = set()  # Avoid duplicates
+        seen_ids = set()
+        seen_names = set()  # Avoid duplicates, ignoring case
+        remaining = limit
         
-        for element in data.get("elements", []):
-            if len(results) >= limit:
+        for element in data.get("elements", ()):
+            if not remaining:
                 break
+            eid = element.get("id")
+            if eid in seen_ids:
+                continue
+            seen_ids.add(eid)
                 
-            tags = element.get("tags", {})
+            tags = element.get("tags")
+            if not tags:
+                continue
             name = tags.get("name")
-            if not name or name in seen_names:
+            if not name:
                 continue
-                
-            seen_names.add(name)
+            name_key = name.casefold()
+            if name_key in seen_names:
+                continue
+            seen_names.add(name_key)
+            remaining -= 1
             
             # Extract categories
             categories = []
@@ -177,65 +407,56 @@ out center meta;
             if "cuisine" in tags:
                 categories.append(f"{tags['cuisine'].title()} Cuisine")
                 
-            results.append({
-                "id": element.get("id"),
-                "name": name,
-                "lat": element.get("lat"),
-                "lng": element.get("lon"),
-                "rating": None,  # OSM doesn't have ratings
-                "categories": categories[:3],  # Limit categories
-                "address": tags.get("addr:full") or f"{tags.get('addr:street', '')} {tags.get('addr:housenumber', '')}".strip() or "Address not available"
-            })
+            results.append(PlaceRecord(
+                id=element.get("id"),
+                name=name,
+                lat=element.get("lat"),
+                lng=element.get("lon"),
+                rating=None,  # OSM doesn't have ratings
+                categories=tuple(categories[:3]),  # Limit categories
+                address=tags.get("addr:full") or f"{tags.get('addr:street', '')} {tags.get('addr:housenumber', '')}".strip() or "Address not available"
+            ))
             
         # If we don't have enough results, add some generic attractions
         if len(results) < 3:
-            generic_places = [
-                {"name": "Local Market", "lat": lat + 0.01, "lng": lng + 0.01, "categories": ["Shopping"]},
-                {"name": "City Center", "lat": lat, "lng": lng, "categories": ["Sightseeing"]},
-                {"name": "Local Restaurant", "lat": lat - 0.01, "lng": lng - 0.01, "categories": ["Dining"]},
-                {"name": "Scenic Viewpoint", "lat": lat + 0.02, "lng": lng + 0.02, "categories": ["Nature"]},
-                {"name": "Cultural Site", "lat": lat - 0.02, "lng": lng + 0.01, "categories": ["Culture"]}
-            ]
-            
-            for place in generic_places:
+            for name, dlat, dlng, category in GENERIC_PLACES:
                 if len(results) >= limit:
                     break
-                place.update({
-                    "id": f"generic_{len(results)}",
-                    "rating": None,
-                    "address": "Address not available"
-                })
-                results.append(place)
+                results.append(PlaceRecord(f"generic_{len(results)}", name, lat + dlat, lng + dlng, None,
+                                           (category,), "Address not available"))
         
-        return results[:limit]
+        results = results[:limit]
+        _osm_cache[cache_key] = results
+        return results
         
     except Exception as e:
-        print(f"OSM query failed: {e}")
+        logger.warning("OSM query failed: %s", e)
         # Fallback to basic attractions if API fails
-        fallback_places = [
-            {"name": "Main Tourist Attraction", "lat": lat, "lng": lng, "categories": ["Attraction"]},
-            {"name": "Popular Restaurant", "lat": lat + 0.005, "lng": lng + 0.005, "categories": ["Restaurant"]},
-            {"name": "Local Cafe", "lat": lat - 0.005, "lng": lng - 0.005, "categories": ["Cafe"]},
-            {"name": "Shopping Area", "lat": lat + 0.01, "lng": lng - 0.01, "categories": ["Shopping"]},
-            {"name": "Cultural Center", "lat": lat - 0.01, "lng": lng + 0.01, "categories": ["Culture"]}
-        ]
-        
-        return [{**place, "id": f"fallback_{i}", "rating": None, "address": "Address not available"} 
-                for i, place in enumerate(fallback_places[:limit])]
+        return [PlaceRecord(f"fallback_{i}", name, lat + dlat, lng + dlng, None, (category,), "Address not available")
+                for i, (name, dlat, dlng, category) in enumerate(FALLBACK_PLACES[:limit])]
 
-def openweather_forecast(lat, lon, days=3, start_date=None):
+async def openweather_forecast(lat, lon, days=3, start_date=None, timeout=10.0):
     """Get weather forecast for the location with enhanced information."""
     if not OPENWEATHER_KEY:
         return [None] * days
-    
+    cache_key = (round(lat, 2), round(lon, 2), days)
+    hit = _weather_cache.get(cache_key)
+    if hit is not None:
+        return hit
+    return await _single_flight(
+        ("weather",) + cache_key,
+        lambda: _fetch_forecast(lat, lon, days, timeout, cache_key))
+
+async def _fetch_forecast(lat, lon, days, timeout, cache_key):
     try:
-        params = {"lat": lat, "lon": lon, "units": "metric", "appid": OPENWEATHER_KEY, "exclude": "minutely,hourly,alerts"}
-        r = requests.get(OW_ONECALL_URL, params=params, timeout=10)
+        params = {"lat": lat, "lon": lon, "units": "metric", "appid": OPENWEATHER_KEY, "exclude": "minutely,hourly,alerts,current"}
+        r = await asyncio.wait_for(
+            http_batcher.submit("GET", OW_ONECALL_URL, params=params), timeout=timeout)
         r.raise_for_status()
-        data = r.json()
+        data = json_loads(r.content)
         
         forecasts = []
-        for i, d in enumerate(data.get("daily", [])[:days]):
+        for i, d in enumerate(data.get("daily", ())[:days]):
             weather_info = d.get("weather", [{}])[0]
             desc = weather_info.get("description", "Clear")
             temp_day = d.get("temp", {}).get("day")
@@ -244,18 +465,8 @@ def openweather_forecast(lat, lon, days=3, start_date=None):
             humidity = d.get("humidity")
             
             # Get weather emoji based on condition
-            weather_emoji = "🌤️"  # default
             desc_lower = desc.lower()
-            if "rain" in desc_lower:
-                weather_emoji = "🌧️"
-            elif "cloud" in desc_lower:
-                weather_emoji = "☁️"
-            elif "clear" in desc_lower or "sun" in desc_lower:
-                weather_emoji = "☀️"
-            elif "snow" in desc_lower:
-                weather_emoji = "🌨️"
-            elif "thunderstorm" in desc_lower:
-                weather_emoji = "⛈️"
+            weather_emoji = next((e for kw, e in _WEATHER_EMOJI if kw in desc_lower), "🌤️")
                 
             forecasts.append({
                 "condition": desc.capitalize(),
@@ -266,9 +477,10 @@ def openweather_forecast(lat, lon, days=3, start_date=None):
                 "emoji": weather_emoji,
                 "description": f"{weather_emoji} {desc.capitalize()}"
             })
+        _weather_cache[cache_key] = forecasts
         return forecasts
     except Exception as e:
-        print(f"Weather API error: {e}")
+        logger.warning("Weather API error: %s", e)
         # Return pleasant weather as fallback
         return [{
             "condition": "Pleasant weather",
@@ -280,64 +492,121 @@ def openweather_forecast(lat, lon, days=3, start_date=None):
             "description": "🌤️ Pleasant weather"
         }] * days
 
+# Static fallback content for popular destinations
+FALLBACK_INTROS = MappingProxyType({
+    "ooty": MappingProxyType({
+        "couple": "🏔️ Nestled in the Nilgiri Hills of Tamil Nadu, Ooty (Udhagamandalam) beckons couples with its enchanting mist-covered mountains and romantic colonial charm. Known as the 'Queen of Hill Stations,' this beautiful retreat offers couples a perfect blend of natural splendor and old-world elegance. Stroll hand-in-hand through the fragrant botanical gardens, enjoy intimate moments by the serene Ooty Lake, and witness breathtaking sunrises from Doddabetta Peak. The vintage charm of the Nilgiri Mountain Railway, the colorful tea gardens stretching as far as the eye can see, and the cozy climate make Ooty an ideal romantic getaway. Whether you're sharing a quiet moment in a hillside café or exploring the beautiful Rose Garden together, Ooty promises memories that will last a lifetime.",
+        "family": "🌟 Welcome to Ooty, the magical 'Queen of Hill Stations' that promises unforgettable family adventures! This charming hill station in Tamil Nadu's Nilgiri Hills offers families the perfect blend of natural beauty, fun activities, and educational experiences. From the exciting toy train journey through tunnels and over bridges to boating on the picturesque Ooty Lake, every moment here is filled with wonder. The expansive Botanical Garden showcases exotic plants and colorful flowers that will captivate both children and adults. Adventure awaits at every turn - from exploring the tea factories and learning about tea-making to enjoying pony rides and visiting the beautiful Rose Garden. Ooty's pleasant climate and safe, family-friendly attractions make it an ideal destination for creating precious family memories.",
+        "solo": "🎒 Discover the soul-stirring beauty of Ooty, where solo travelers find both adventure and tranquility in perfect harmony. This hill station offers the ideal setting for self-discovery, with peaceful walking trails through eucalyptus groves, quiet moments by the lake, and stunning viewpoints perfect for reflection. The colonial architecture tells stories of the past, while the vibrant local markets offer authentic experiences. Whether you're photographing the morning mist rolling over tea gardens, enjoying a cup of fresh Nilgiri tea while watching the sunset, or taking the scenic toy train journey, Ooty provides countless opportunities for meaningful solo exploration.",
+        "friends": "🎉 Get ready for an amazing adventure in Ooty with your squad! This hill station is the perfect playground for friends seeking both excitement and relaxation. From thrilling activities like trekking in the Nilgiri Hills to fun-filled boat rides on Ooty Lake, there's never a dull moment. Explore the vibrant local markets together, indulge in street food adventures, and capture Instagram-worthy shots at the colorful tea gardens. The cool weather makes it perfect for outdoor activities, group photography sessions at scenic spots, and cozy evenings around bonfires. Whether you're racing down the slopes or sharing stories over hot chocolate, Ooty promises an unforgettable group getaway."
+    }),
+    "paris": MappingProxyType({
+        "couple": "💕 Paris, the City of Love, awaits with its timeless romance and unparalleled charm. From intimate Seine river cruises at sunset to candlelit dinners in hidden bistros, every corner of this magnificent city whispers sweet promises to lovers. The Eiffel Tower's golden glow at night, leisurely walks along the Champs-Élysées, and stolen kisses in Montmartre create the perfect romantic symphony.",
+        "family": "🎠 Paris enchants families with its perfect blend of culture, fun, and magical experiences. From the wonder of Disneyland Paris to the educational treasures of the Louvre, this city offers unforgettable adventures for every family member. Climb the Eiffel Tower together, enjoy picnics in beautiful parks, and create magical memories that will last a lifetime.",
+        "solo": "🗼 Paris beckons solo travelers with its rich culture, stunning architecture, and café culture. Wander through artistic neighborhoods, discover hidden gems, and immerse yourself in the city's intellectual and creative energy. Every museum, every street corner, every café offers a new story to discover.",
+        "friends": "🥐 Paris with friends is an adventure filled with laughter, discovery, and unforgettable moments. From exploring vibrant neighborhoods to enjoying group dinners in cozy bistros, the City of Light offers endless possibilities for fun and friendship."
+    }),
+})
+
 def groq_generate_city_intro(destination: str, traveler_type: str):
     """Generate a beautiful city introduction - with fallback to curated content."""
-    # Static fallback content for popular destinations
-    fallback_intros = {
-        "ooty": {
-            "couple": "🏔️ Nestled in the Nilgiri Hills of Tamil Nadu, Ooty (Udhagamandalam) beckons couples with its enchanting mist-covered mountains and romantic colonial charm. Known as the 'Queen of Hill Stations,' this beautiful retreat offers couples a perfect blend of natural splendor and old-world elegance. Stroll hand-in-hand through the fragrant botanical gardens, enjoy intimate moments by the serene Ooty Lake, and witness breathtaking sunrises from Doddabetta Peak. The vintage charm of the Nilgiri Mountain Railway, the colorful tea gardens stretching as far as the eye can see, and the cozy climate make Ooty an ideal romantic getaway. Whether you're sharing a quiet moment in a hillside café or exploring the beautiful Rose Garden together, Ooty promises memories that will last a lifetime.",
-            "family": "🌟 Welcome to Ooty, the magical 'Queen of Hill Stations' that promises unforgettable family adventures! This charming hill station in Tamil Nadu's Nilgiri Hills offers families the perfect blend of natural beauty, fun activities, and educational experiences. From the exciting toy train journey through tunnels and over bridges to boating on the picturesque Ooty Lake, every moment here is filled with wonder. The expansive Botanical Garden showcases exotic plants and colorful flowers that will captivate both children and adults. Adventure awaits at every turn - from exploring the tea factories and learning about tea-making to enjoying pony rides and visiting the beautiful Rose Garden. Ooty's pleasant climate and safe, family-friendly attractions make it an ideal destination for creating precious family memories.",
-            "solo": "🎒 Discover the soul-stirring beauty of Ooty, where solo travelers find both adventure and tranquility in perfect harmony. This hill station offers the ideal setting for self-discovery, with peaceful walking trails through eucalyptus groves, quiet moments by the lake, and stunning viewpoints perfect for reflection. The colonial architecture tells stories of the past, while the vibrant local markets offer authentic experiences. Whether you're photographing the morning mist rolling over tea gardens, enjoying a cup of fresh Nilgiri tea while watching the sunset, or taking the scenic toy train journey, Ooty provides countless opportunities for meaningful solo exploration.",
-            "friends": "🎉 Get ready for an amazing adventure in Ooty with your squad! This hill station is the perfect playground for friends seeking both excitement and relaxation. From thrilling activities like trekking in the Nilgiri Hills to fun-filled boat rides on Ooty Lake, there's never a dull moment. Explore the vibrant local markets together, indulge in street food adventures, and capture Instagram-worthy shots at the colorful tea gardens. The cool weather makes it perfect for outdoor activities, group photography sessions at scenic spots, and cozy evenings around bonfires. Whether you're racing down the slopes or sharing stories over hot chocolate, Ooty promises an unforgettable group getaway."
-        },
-        "paris": {
-            "couple": "💕 Paris, the City of Love, awaits with its timeless romance and unparalleled charm. From intimate Seine river cruises at sunset to candlelit dinners in hidden bistros, every corner of this magnificent city whispers sweet promises to lovers. The Eiffel Tower's golden glow at night, leisurely walks along the Champs-Élysées, and stolen kisses in Montmartre create the perfect romantic symphony.",
-            "family": "🎠 Paris enchants families with its perfect blend of culture, fun, and magical experiences. From the wonder of Disneyland Paris to the educational treasures of the Louvre, this city offers unforgettable adventures for every family member. Climb the Eiffel Tower together, enjoy picnics in beautiful parks, and create magical memories that will last a lifetime.",
-            "solo": "🗼 Paris beckons solo travelers with its rich culture, stunning architecture, and café culture. Wander through artistic neighborhoods, discover hidden gems, and immerse yourself in the city's intellectual and creative energy. Every museum, every street corner, every café offers a new story to discover.",
-            "friends": "🥐 Paris with friends is an adventure filled with laughter, discovery, and unforgettable moments. From exploring vibrant neighborhoods to enjoying group dinners in cozy bistros, the City of Light offers endless possibilities for fun and friendship."
-        }
-    }
-    
     # Try to get destination-specific intro
     dest_key = destination.lower().strip()
     traveler_key = traveler_type.lower().strip()
     
-    if dest_key in fallback_intros and traveler_key in fallback_intros[dest_key]:
-        return fallback_intros[dest_key][traveler_key]
+    intro = FALLBACK_INTROS.get(dest_key, {}).get(traveler_key)
+    if intro:
+        return intro
     
     # Generic fallback
     return f"🌍 Welcome to {destination}! This beautiful destination offers {traveler_type} travelers an amazing opportunity to explore, discover, and create unforgettable memories. From stunning natural beauty to rich cultural experiences, {destination} has something special waiting for every visitor. Get ready for an adventure that will leave you with stories to tell for years to come!"
 
+# Traveler-type specific advice appended to the detailed guide
+_FAMILY_TIPS = """
+• **Kid-Friendly Activities**: Plan activities that engage all family members
+• **Safety First**: Keep emergency contacts and first aid kit handy
+• **Rest Breaks**: Schedule regular breaks, especially if traveling with young children
+• **Educational Opportunities**: Turn sightseeing into learning experiences for kids
+"""
+_DEFAULT_TIPS = """
+• **Plan Together**: Discuss preferences and interests with your travel companions
+• **Stay Flexible**: Be open to changes and spontaneous adventures
+• **Capture Memories**: Take lots of photos and keep a travel journal
+• **Enjoy the Moment**: Don't forget to put the phone down and truly experience each location
+"""
+TRAVELER_TIPS = MappingProxyType({
+    "couple": """
+• **Romantic Moments**: Plan sunset viewing at scenic spots for unforgettable memories
+• **Private Experiences**: Book private boat rides or intimate dining experiences
+• **Photography**: Carry a camera for couple photos at beautiful locations
+• **Comfortable Pace**: Don't rush - allow time for spontaneous romantic moments
+""",
+    "solo": """
+• **Stay Connected**: Share your itinerary with family/friends back home
+• **Local Connections**: Don't hesitate to chat with locals for authentic experiences
+• **Flexible Planning**: Leave room for spontaneous discoveries
+• **Personal Safety**: Trust your instincts and stay in well-lit, populated areas
+""",
+    "friends": """
+• **Group Activities**: Plan activities everyone can enjoy together
+• **Photo Opportunities**: Designate a group photographer for memorable shots
+• **Budget Planning**: Discuss and agree on budget for activities and meals
+• **Compromise**: Be flexible with plans to accommodate everyone's interests
+""",
+})
+
 def groq_generate_detailed_plan(req: PlanRequest, plan: List[DayPlan], city_intro: str = None):
     """Generate a comprehensive and engaging itinerary explanation with fallback."""
+    # Reduce the plan to the hashable fields the guide renders, so identical plans hit the cache
+    skeleton = tuple(
+        (
+            p.day,
+            p.date,
+            (p.weather.get('condition', 'Pleasant'), p.weather.get('avg_temp_c')) if p.weather else None,
+            tuple(
+                (slot.part, slot.place.name, tuple(slot.place.categories or ()))
+                if slot.place and slot.place.name != "Free exploration" else (slot.part, None, ())
+                for slot in p.slots
+            ),
+        )
+        for p in plan
+    )
+    return _detailed_plan_cached(req.destination, req.traveler_type, req.days, skeleton, city_intro)
+
+@lru_cache(maxsize=512)
+def _detailed_plan_cached(destination: str, traveler_type: str, days: int, skeleton: tuple, city_intro: Optional[str]) -> str:
+    dest_lc = destination.casefold()
+    traveler_lc = traveler_type.casefold()
     
     # Build plan overview
     plan_overview = []
-    for p in plan:
+    for day, date, weather, slots in skeleton:
         weather_str = ""
-        if p.weather:
-            weather_str = f" 🌤️ Weather: {p.weather.get('condition', 'Pleasant')}"
-            if p.weather.get('avg_temp_c'):
-                weather_str += f", {p.weather.get('avg_temp_c')}°C"
+        if weather:
+            condition, avg_temp = weather
+            weather_str = f" 🌤️ Weather: {condition}"
+            if avg_temp:
+                weather_str += f", {avg_temp}°C"
         
         activities = []
-        for slot in p.slots:
-            if slot.place and slot.place.name != "Free exploration":
-                emoji = "🏖️" if "Morning" in slot.part else "🌅" if "Afternoon" in slot.part else "🌆"
-                activities.append(f"  {emoji} **{slot.part}**: {slot.place.name}")
-                if slot.place.categories:
-                    activities[-1] += f" ({', '.join(slot.place.categories)})"
+        for part, name, categories in slots:
+            if name:
+                emoji = "🏖️" if "Morning" in part else "🌅" if "Afternoon" in part else "🌆"
+                line = f"  {emoji} **{part}**: {name}"
+                if categories:
+                    line += f" ({', '.join(categories)})"
+                activities.append(line)
             else:
-                emoji = "🌅" if "Afternoon" in slot.part else "🌆"
-                activities.append(f"  {emoji} **{slot.part}**: Free exploration time")
+                emoji = "🌅" if "Afternoon" in part else "🌆"
+                activities.append(f"  {emoji} **{part}**: Free exploration time")
         
-        plan_overview.append(f"**Day {p.day}** ({p.date}){weather_str}\n" + "\n".join(activities))
+        plan_overview.append(f"**Day {day}** ({date}){weather_str}\n" + "\n".join(activities))
     
     # Create comprehensive guide
     plan_text = '\n\n'.join(plan_overview)
-    intro_text = city_intro if city_intro else f"Get ready to explore the amazing destination of {req.destination}!"
+    intro_text = city_intro if city_intro else f"Get ready to explore the amazing destination of {destination}!"
     
-    guide_content = f"""🌟 **Welcome to Your {req.days}-Day {req.destination} Adventure!**
+    parts = [f"""🌟 **Welcome to Your {days}-Day {destination} Adventure!**
 
 {intro_text}
 
@@ -346,11 +615,11 @@ def groq_generate_detailed_plan(req: PlanRequest, plan: List[DayPlan], city_intr
 {plan_text}
 
 🍽️ **Local Cuisine Must-Tries**
-"""
+"""]
     
     # Add destination-specific recommendations
-    if req.destination.lower() == "ooty":
-        guide_content += """
+    if dest_lc == "ooty":
+        parts.append("""
 • **Fresh Nilgiri Tea**: Sip on the world-famous tea while enjoying mountain views
 • **Homemade Chocolates**: Visit local chocolate factories for fresh, artisanal treats
 • **Varkey (Ooty Bread)**: A local specialty perfect for breakfast with butter and jam
@@ -367,9 +636,9 @@ def groq_generate_detailed_plan(req: PlanRequest, plan: List[DayPlan], city_intr
 • **Tea Garden Walks**: Ask locals about lesser-known tea gardens where you can walk among the bushes
 • **Local Markets**: Visit the main bazaar in the evening for fresh produce and authentic shopping experience
 • **Heritage Bungalows**: Some colonial-era bungalows offer tours showcasing Ooty's British heritage
-"""
+""")
     else:
-        guide_content += f"""
+        parts.append(f"""
 • **Local Specialties**: Ask your hotel or local guides for the most authentic regional dishes
 • **Street Food**: Explore local markets for genuine street food experiences
 • **Traditional Restaurants**: Visit family-run establishments for authentic flavors
@@ -383,116 +652,93 @@ def groq_generate_detailed_plan(req: PlanRequest, plan: List[DayPlan], city_intr
 • **Early Hours**: Visit popular attractions early morning for better photos and fewer crowds
 • **Local Guides**: Hire local guides for authentic stories and hidden viewpoints
 • **Seasonal Events**: Check for local festivals or events happening during your visit
-"""
+""")
     
     # Add traveler-type specific advice
-    guide_content += f"\n🎒 **Special Tips for {req.traveler_type.title()} Travelers**\n"
+    parts.append(f"\n🎒 **Special Tips for {traveler_type.title()} Travelers**\n")
     
-    if req.traveler_type.lower() == "couple":
-        guide_content += """
-• **Romantic Moments**: Plan sunset viewing at scenic spots for unforgettable memories
-• **Private Experiences**: Book private boat rides or intimate dining experiences
-• **Photography**: Carry a camera for couple photos at beautiful locations
-• **Comfortable Pace**: Don't rush - allow time for spontaneous romantic moments
-"""
-    elif "family" in req.traveler_type.lower():
-        guide_content += """
-• **Kid-Friendly Activities**: Plan activities that engage all family members
-• **Safety First**: Keep emergency contacts and first aid kit handy
-• **Rest Breaks**: Schedule regular breaks, especially if traveling with young children
-• **Educational Opportunities**: Turn sightseeing into learning experiences for kids
-"""
-    elif req.traveler_type.lower() == "solo":
-        guide_content += """
-• **Stay Connected**: Share your itinerary with family/friends back home
-• **Local Connections**: Don't hesitate to chat with locals for authentic experiences
-• **Flexible Planning**: Leave room for spontaneous discoveries
-• **Personal Safety**: Trust your instincts and stay in well-lit, populated areas
-"""
-    elif req.traveler_type.lower() == "friends":
-        guide_content += """
-• **Group Activities**: Plan activities everyone can enjoy together
-• **Photo Opportunities**: Designate a group photographer for memorable shots
-• **Budget Planning**: Discuss and agree on budget for activities and meals
-• **Compromise**: Be flexible with plans to accommodate everyone's interests
-"""
-    else:
-        guide_content += f"""
-• **Plan Together**: Discuss preferences and interests with your travel companions
-• **Stay Flexible**: Be open to changes and spontaneous adventures
-• **Capture Memories**: Take lots of photos and keep a travel journal
-• **Enjoy the Moment**: Don't forget to put the phone down and truly experience each location
-"""
+    parts.append(TRAVELER_TIPS.get(traveler_lc, _FAMILY_TIPS if "family" in traveler_lc else _DEFAULT_TIPS))
     
-    guide_content += f"\n\n✨ **Have an amazing time exploring {req.destination}! Remember, the best travel experiences often come from unexpected moments and genuine connections with local culture and people.**"
+    parts.append(f"\n\n✨ **Have an amazing time exploring {destination}! Remember, the best travel experiences often come from unexpected moments and genuine connections with local culture and people.**")
     
-    return guide_content
+    return "".join(parts)
+
+def first_categories(places, limit=3):
+    """Distinct categories across places in first-seen order, stopping at `limit`."""
+    cats, seen = [], set()
+    for p in places:
+        for c in p.categories:
+            if c not in seen:
+                seen.add(c)
+                cats.append(c)
+                if len(cats) == limit:
+                    return cats
+    return cats
 
 # -------------------------
 # Endpoint: /plan
 # -------------------------
 @app.post("/plan", response_model=PlanResponse)
-def plan(req: PlanRequest):
+async def plan(req: PlanRequest):
     try:
+        # Upstream calls share one budget; on timeout each helper falls back
+        deadline = time.monotonic() + PLAN_BUDGET_S
+
         # Geocode destination if needed
         lat, lng = req.stay_lat, req.stay_lng
         if lat is None or lng is None:
-            geo = geocode_location(req.destination)
+            geo = await geocode_location(req.destination, timeout=remaining_budget(deadline))
             if not geo:
                 raise HTTPException(status_code=400, detail=f"Could not geocode destination '{req.destination}'. Provide stay_lat & stay_lng")
             lat, lng = geo
 
-        # Fetch places using OpenStreetMap
-        places = osm_search_places(lat, lng, traveler_type=req.traveler_type, limit=req.days * 3)
-        
-        # Get weather forecast with start date
-        weather_list = openweather_forecast(lat, lng, days=req.days, start_date=req.start_date)
+        # Fetch places (OpenStreetMap) and weather forecast concurrently
+        budget = remaining_budget(deadline)
+        places_task = asyncio.create_task(
+            osm_search_places(lat, lng, traveler_type=req.traveler_type, limit=req.days * 3, timeout=budget))
+        weather_task = asyncio.create_task(
+            openweather_forecast(lat, lng, days=req.days, start_date=req.start_date, timeout=budget))
+        places, weather_list = await asyncio.gather(places_task, weather_task)
 
         # Calculate actual dates for the trip
-        if req.start_date:
-            start_date = datetime.fromisoformat(req.start_date)
-        else:
-            start_date = datetime.utcnow()
+        base = (datetime.fromisoformat(req.start_date) if req.start_date else datetime.now(timezone.utc)).date()
+        dates = [(base + timedelta(days=i)).isoformat() for i in range(req.days)]
 
-        # Build per-day plan
+        # Build per-day plan. Response models are built with model_construct:
+        # every field comes from validated input or our own helpers.
         plan_list: List[DayPlan] = []
         places_per_day = max(1, len(places) // req.days)
+        places_iter = iter(places)
         
         for d in range(req.days):
-            start_idx = d * places_per_day
-            end_idx = min((d + 1) * places_per_day, len(places))
-            day_places = places[start_idx:end_idx]
+            day_places = list(islice(places_iter, places_per_day))
             
             # Create time slots
             slots = []
-            time_parts = ["Morning", "Afternoon", "Evening"]
             
-            for i, part in enumerate(time_parts):
+            for i, part in enumerate(TIME_PARTS):
                 if i < len(day_places):
-                    place_data = day_places[i]
-                    place = PlaceInfo(
-                        name=place_data["name"],
-                        lat=place_data["lat"],
-                        lng=place_data["lng"],
-                        rating=place_data.get("rating"),
-                        address=place_data.get("address"),
-                        categories=place_data.get("categories")
+                    rec = day_places[i]
+                    place = PlaceInfo.model_construct(
+                        name=rec.name,
+                        lat=rec.lat,
+                        lng=rec.lng,
+                        rating=rec.rating,
+                        address=rec.address,
+                        categories=list(rec.categories)
                     )
                 else:
-                    place = PlaceInfo(name="Free exploration")
+                    place = PlaceInfo.model_construct(name="Free exploration")
                 
-                slots.append(TimeSlot(part=part, place=place))
+                slots.append(TimeSlot.model_construct(part=part, place=place))
             
             # Use enhanced weather data
             weather = weather_list[d] if weather_list and len(weather_list) > d else None
-            categories = list(set([cat for place in day_places for cat in (place.get("categories") or [])]))[:3]
-            
-            # Calculate actual date for this day
-            current_date = start_date + timedelta(days=d)
+            categories = first_categories(day_places)
             
-            plan_list.append(DayPlan(
+            plan_list.append(DayPlan.model_construct(
                 day=d + 1,
-                date=current_date.strftime("%Y-%m-%d"),
+                date=dates[d],
                 slots=slots,
                 weather=weather,
                 categories=categories
@@ -508,7 +754,7 @@ def plan(req: PlanRequest):
             # Generate detailed travel plan
             detailed_notes = groq_generate_detailed_plan(req, plan_list, city_intro)
 
-        return PlanResponse(
+        return PlanResponse.model_construct(
             destination=req.destination,
             traveler_type=req.traveler_type,
             days=req.days,
@@ -1,51 +1,82 @@
 import os
+import asyncio
+import threading
+import numpy as np
 from typing import Optional, Tuple, List, Dict, Any
 from .preferences import build_weighted_sequence, sequence_to_days
-from .places import geocode_city, candidates_for_category, nearest_route
+from .places import (geocode_city, category_queries, fetch_query_results, candidates_for_category,
+                     nearest_route, haversine_vector)
 from .weather import daily_forecast, prefer_indoor_if_rain
+from .session import json_dumps
 
-from groq import Groq
+from groq import AsyncGroq
 
 GROQ_KEY = os.getenv("GROQ_API_KEY")
 
+# One long-lived event loop for the pipeline's async I/O. asyncio.run would hand every
+# call a fresh loop, and loop-bound clients such as AsyncGroq could never be reused.
+_LOOP = None
+_LOOP_LOCK = threading.Lock()
+
+def _run(coro):
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="planner-io", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _LOOP).result()
+
+_GROQ_CLIENT = None
+
+def _groq():
+    """Lazily built AsyncGroq client; only touch it from coroutines running on _LOOP."""
+    global _GROQ_CLIENT
+    if _GROQ_CLIENT is None and GROQ_KEY:
+        _GROQ_CLIENT = AsyncGroq(api_key=GROQ_KEY)
+    return _GROQ_CLIENT
+
 def score_candidates(start_latlng: Tuple[float,float], items: List[Dict[str,Any]], k=1):
     # Score = 0.6*rating_norm + 0.4*(1 - distance_norm)
-    if not items:
+    if not items or k <= 0:
         return []
-    from .places import haversine
-    dists = [haversine(start_latlng, (x["lat"], x["lng"])) for x in items]
-    ratings = [x.get("rating", 0) for x in items]
-    dmin, dmax = min(dists), max(dists)
-    rmin, rmax = min(ratings), max(ratings)
-    scored = []
-    for x, d, r in zip(items, dists, ratings):
-        dn = 0 if dmax == dmin else (d - dmin) / (dmax - dmin)
-        rn = 0 if rmax == rmin else (r - rmin) / (rmax - rmin)
-        score = 0.6 * rn + 0.4 * (1 - dn)
-        scored.append((score, x))
-    scored.sort(key=lambda t: t[0], reverse=True)
-    return [x for _, x in scored[:k]]
-
-def groq_refine(destination: str, latlng, traveler_type: str, days_data: List[Dict[str,Any]]):
+    if len(items) <= k:
+        # Everything makes the shortlist; order by rating without scoring
+        return sorted(items, key=lambda x: -x.get("rating", 0))
+    dists = haversine_vector(start_latlng, [(x["lat"], x["lng"]) for x in items])
+    ratings = np.array([x.get("rating", 0) for x in items], dtype=float)
+    # Min-max normalize both columns in one pass; a constant column normalizes to 0
+    arr = np.column_stack([dists, ratings])
+    rng = np.ptp(arr, axis=0)
+    norm = (arr - arr.min(axis=0)) / np.where(rng == 0, 1, rng)
+    scores = 0.6 * norm[:, 1] + 0.4 * (1 - norm[:, 0])
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [items[i] for i in top]
+
+async def groq_refine(destination: str, latlng, traveler_type: str, days_data: List[Dict[str,Any]]):
     if not GROQ_KEY:
         return None
-    client = Groq(api_key=GROQ_KEY)
     # Prepare a compact prompt
     payload = {
         "destination": destination,
-        "latlng": {"lat": latlng, "lng": latlng[1]},
+        "latlng": {"lat": latlng[0], "lng": latlng[1]},
         "traveler_type": traveler_type,
         "days": days_data
     }
     system = "You are a concise travel planner. Produce helpful notes and backup alternatives."
-    user = f"Refine this plan JSON and add one sentence notes per day and one nearby meal suggestion per slot.\nJSON:\n{payload}"
-    chat = client.chat.completions.create(
+    user = f"Refine this plan JSON and add one sentence notes per day and one nearby meal suggestion per slot.\nJSON:\n{json_dumps(payload)}"
+    stream = await _groq().chat.completions.create(
         model="llama-3.1-70b-versatile",
         messages=[{"role":"system","content":system},{"role":"user","content":user}],
         temperature=0.2,
-        max_tokens=800
+        max_tokens=800,
+        stream=True
     )
-    return chat.choices.message.content
+    parts = []
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+    return "".join(parts)
 
 def generate_itinerary(traveler_type: str, destination: str, days: int, start_date: Optional[str] = None,
                        stay_latlng: Optional[Tuple[float,float]] = None, use_groq: bool = False):
@@ -61,22 +92,26 @@ def generate_itinerary(traveler_type: str, destination: str, days: int, start_da
     # Weather summary per day
     forecasts = daily_forecast(latlng[0], latlng[1], days)
 
-    plan = []
-    for i, cats in enumerate(per_day_categories):
-        cats = [c for c in cats if c]
-        # Weather-aware tweak
-        fcast = forecasts[i] if i < len(forecasts) else None
-        cats = prefer_indoor_if_rain(cats, fcast)
+    # Weather-aware tweak
+    day_forecasts = [forecasts[i] if i < len(forecasts) else None for i in range(len(per_day_categories))]
+    day_categories = [prefer_indoor_if_rain([c for c in cats if c], fcast)
+                      for cats, fcast in zip(per_day_categories, day_forecasts)]
 
+    # Categories share queries (e.g. "viewpoint"), so run each distinct query once for the whole trip
+    all_queries = [q for cats in day_categories for c in cats for q in category_queries(c)]
+    query_results = _run(fetch_query_results(latlng[0], latlng[1], all_queries, max_results=10))
+
+    plan = []
+    for i, (cats, fcast) in enumerate(zip(day_categories, day_forecasts)):
         # Candidates and picks
         day_shortlists = []
         for c in cats:
-            cand = candidates_for_category(latlng, latlng[1], c, max_results=10)
+            cand = candidates_for_category(query_results, c)
             picks = score_candidates(latlng, cand, k=3)  # shortlist
             if picks:
                 day_shortlists.append({"category": c, "picks": picks})
 
-        chosen = [sl["picks"] for sl in day_shortlists if sl["picks"]]
+        chosen = [sl["picks"][0] for sl in day_shortlists]
         route = nearest_route(latlng, chosen)
 
         slots = []
@@ -100,7 +135,7 @@ def generate_itinerary(traveler_type: str, destination: str, days: int, start_da
     groq_notes = None
     if use_groq:
         try:
-            groq_notes = groq_refine(destination, latlng, traveler_type, plan)
+            groq_notes = _run(groq_refine(destination, latlng, traveler_type, plan))
         except Exception:
             groq_notes = None
 
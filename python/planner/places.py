@@ -1,10 +1,34 @@
 import os
+import importlib.util
 import time
-import requests
+import asyncio
+import httpx
+import numpy as np
+import threading
+from cachetools import LRUCache, TTLCache
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 from math import radians, sin, cos, sqrt, atan2
+from .session import SESSION, json_loads
+from .weather import OWM_KEY
+
+# Optional: numba JIT-compiles the haversine kernels; plain Python/NumPy otherwise
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except Exception:
+    HAS_NUMBA = False
+    prange = range
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+# Optional: scipy KD-tree for routing large point sets; imported on first use, since
+# the pipeline's per-day routes never get near KDTREE_MIN_POINTS
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
 
 FOURSQUARE_KEY = os.getenv("FOURSQUARE_API_KEY")
 
+_GEOCODE_POOL = ThreadPoolExecutor(max_workers=4)
+
 CATEGORY_QUERY = {
     "romantic": ["scenic viewpoint", "sunset point", "romantic restaurant"],
     "scenic": ["viewpoint", "scenic view"],
@@ -43,20 +67,77 @@ CATEGORY_QUERY = {
     "city_tours": ["city tour"]
 }
 
-def geocode_city(place: str):
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"q": place, "format": "json", "limit": 1}
-    headers = {"User-Agent": "TravelPlanner/1.0"}
-    r = requests.get(url, headers=headers, params=params, timeout=20)
+class _CQ(dict):
+    """Category -> query list; unknown categories resolve to their spaced name once, then stay cached."""
+    def __missing__(self, cat):
+        qs = self[cat] = [cat.replace("_", " ")]
+        return qs
+
+_CAT_Q = _CQ(CATEGORY_QUERY)
+
+# Search results keyed on query params, with coordinates rounded to ~100 m
+_SEARCH_CACHE = TTLCache(maxsize=4096, ttl=24 * 3600)
+
+def _geocode_nominatim(place: str):
+    r = SESSION.get("https://nominatim.openstreetmap.org/search",
+                    params={"q": place, "format": "json", "limit": 1}, timeout=20)
     r.raise_for_status()
-    data = r.json()
+    data = json_loads(r.content)
     if not data:
         return None
     return float(data[0]["lat"]), float(data[0]["lon"])
 
-def places_text_search(query: str, lat: float, lng: float, radius=15000, min_rating=3.5, max_results=12):
+def _geocode_owm(place: str):
+    if not OWM_KEY:
+        return None
+    r = SESSION.get("https://api.openweathermap.org/geo/1.0/direct",
+                    params={"q": place, "limit": 1, "appid": OWM_KEY}, timeout=20)
+    r.raise_for_status()
+    data = json_loads(r.content)
+    if not data:
+        return None
+    return float(data[0]["lat"]), float(data[0]["lon"])
+
+# Geocodes keyed by place; failures are not cached so a transient outage doesn't stick
+_GEOCODE_CACHE = LRUCache(maxsize=1024)
+_GEOCODE_LOCK = threading.Lock()
+
+def geocode_city(place: str):
+    with _GEOCODE_LOCK:
+        hit = _GEOCODE_CACHE.get(place)
+    if hit is not None:
+        return hit
+    geo = _geocode_uncached(place)
+    if geo is not None:
+        with _GEOCODE_LOCK:
+            _GEOCODE_CACHE[place] = geo
+    return geo
+
+def _geocode_uncached(place: str):
+    """Query Nominatim and OpenWeather concurrently; the first non-empty answer wins."""
+    futs = [_GEOCODE_POOL.submit(fn, place) for fn in (_geocode_nominatim, _geocode_owm)]
+    try:
+        for fut in as_completed(futs, timeout=20):
+            try:
+                geo = fut.result()
+            except Exception:
+                continue
+            if geo:
+                return geo
+    except FuturesTimeout:
+        pass
+    finally:
+        for fut in futs:
+            fut.cancel()
+    return None
+
+async def places_text_search(client: httpx.AsyncClient, query: str, lat: float, lng: float, radius=15000, min_rating=3.5, max_results=12):
     if not FOURSQUARE_KEY:
         raise RuntimeError("FOURSQUARE_API_KEY not set")
+    cache_key = (query, round(lat, 3), round(lng, 3), radius, min_rating, max_results)
+    hit = _SEARCH_CACHE.get(cache_key)
+    if hit is not None:
+        return hit
     url = "https://api.foursquare.com/v3/places/search"
     headers = {"Authorization": FOURSQUARE_KEY, "Accept": "application/json"}
     params = {
@@ -65,9 +146,9 @@ def places_text_search(query: str, lat: float, lng: float, radius=15000, min_rat
         "radius": radius,
         "limit": max_results
     }
-    r = requests.get(url, headers=headers, params=params, timeout=25)
+    r = await client.get(url, headers=headers, params=params, timeout=25)
     r.raise_for_status()
-    data = r.json()
+    data = json_loads(r.content)
     out = []
     for p in data.get("results", []):
         rating = p.get("rating", 0) / 2  # Foursquare rating out of 10, normalize to 5
@@ -83,31 +164,128 @@ def places_text_search(query: str, lat: float, lng: float, radius=15000, min_rat
                 "price_level": None,
                 "types": [c["name"] for c in p.get("categories", [])]
             })
+    _SEARCH_CACHE[cache_key] = out
     return out
 
-def candidates_for_category(lat: float, lng: float, cat: str, max_results=8):
-    queries = CATEGORY_QUERY.get(cat, [cat.replace("_"," ")])
-    seen = {}
-    for q in queries:
-        for p in places_text_search(q, lat, lng, max_results=max_results):
+def category_queries(cat: str):
+    return _CAT_Q[cat]
+
+# Cap on simultaneous Foursquare searches, so a long trip doesn't burst into a 429
+FSQ_MAX_CONCURRENCY = 6
+
+_FSQ_CLIENT = None
+_FSQ_SEM = None
+
+def _fsq_client():
+    """Lazily built shared HTTP/2 client; only touch it from coroutines on the pipeline's _LOOP."""
+    global _FSQ_CLIENT, _FSQ_SEM
+    if _FSQ_CLIENT is None:
+        _FSQ_CLIENT = httpx.AsyncClient(http2=True)
+        _FSQ_SEM = asyncio.Semaphore(FSQ_MAX_CONCURRENCY)
+    return _FSQ_CLIENT
+
+async def fetch_query_results(lat: float, lng: float, queries, max_results=8):
+    """Run each distinct query once on the shared HTTP/2 client, a bounded number at a time; returns {query: results}."""
+    queries = list(dict.fromkeys(queries))
+    client = _fsq_client()
+
+    async def search(q):
+        async with _FSQ_SEM:
+            return await places_text_search(client, q, lat, lng, max_results=max_results)
+
+    results = await asyncio.gather(*(search(q) for q in queries))
+    return dict(zip(queries, results))
+
+def candidates_for_category(query_results, cat: str):
+    """Merge the prefetched results of a category's queries, deduplicated by place_id."""
+    seen_ids, results = set(), []
+    for q in _CAT_Q[cat]:
+        for p in query_results.get(q, ()):
             key = p["place_id"]
-            if key not in seen:
-                seen[key] = p | {"category": cat}
-    return list(seen.values())
+            if key not in seen_ids:
+                seen_ids.add(key)
+                # Copy, don't tag in place: the same result dicts are shared across
+                # categories (overlapping queries) and live on in _SEARCH_CACHE
+                results.append({**p, "category": cat})
+    return results
 
-def haversine(a, b):
+@njit(cache=True, fastmath=True)
+def _haversine_scalar(lat1, lon1, lat2, lon2):
     R = 6371.0
-    lat1, lon1 = a; lat2, lon2 = b
     dlat = radians(lat2 - lat1); dlon = radians(lon2 - lon1)
     x = sin(dlat/2)**2 + cos(radians(lat1))*cos(radians(lat2))*sin(dlon/2)**2
     return 2*R*atan2(sqrt(x), sqrt(1 - x))
 
+def haversine(a, b):
+    return _haversine_scalar(a[0], a[1], b[0], b[1])
+
+@njit(cache=True, fastmath=True, parallel=True)
+def haversine_batch(lat0, lon0, lats, lons):
+    """Distances in km from (lat0, lon0) to each (lats[i], lons[i])."""
+    out = np.empty(lats.shape[0])
+    for i in prange(lats.shape[0]):
+        out[i] = _haversine_scalar(lat0, lon0, lats[i], lons[i])
+    return out
+
+def _haversine_np(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; accepts scalars or broadcastable ndarrays."""
+    R = 6371.0
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    x = np.sin((lat2 - lat1)/2)**2 + np.cos(lat1)*np.cos(lat2)*np.sin((lon2 - lon1)/2)**2
+    return 2*R*np.arctan2(np.sqrt(x), np.sqrt(1 - x))
+
+def haversine_vector(start, pts):
+    """Distances in km from `start` (lat, lng) to every row of an (N, 2) lat/lng array."""
+    pts = np.asarray(pts, dtype=float).reshape(-1, 2)
+    if HAS_NUMBA:
+        return haversine_batch(float(start[0]), float(start[1]), pts[:, 0].copy(), pts[:, 1].copy())
+    return _haversine_np(start[0], start[1], pts[:, 0], pts[:, 1])
+
+def haversine_matrix(pts):
+    """Pairwise (N, N) distance matrix in km for an (N, 2) lat/lng array."""
+    pts = np.asarray(pts, dtype=float)
+    return _haversine_np(pts[:, None, 0], pts[:, None, 1], pts[None, :, 0], pts[None, :, 1])
+
+# Above this many points the O(N^2) matrix gives way to a KD-tree
+KDTREE_MIN_POINTS = 64
+
+def _nearest_route_kdtree(P, points):
+    from scipy.spatial import cKDTree
+    # Equirectangular projection: at city scale Euclidean distance ~= haversine
+    R = 6371.0
+    lat = np.radians(P[:, 0])
+    xy = np.column_stack([R * np.cos(lat.mean()) * np.radians(P[:, 1]), R * lat])
+    tree = cKDTree(xy)
+    used = np.zeros(len(P), dtype=bool)
+    used[0] = True
+    route, cur = [], 0
+    for _ in range(len(points)):
+        k = 8
+        while True:
+            _, idx = tree.query(xy[cur], k=min(k, len(P)))
+            free = idx[~used[idx]]
+            if free.size:
+                cur = int(free[0])
+                break
+            k *= 4
+        used[cur] = True
+        route.append(points[cur - 1])
+    return route
+
 def nearest_route(start_latlng, points):
-    route, unused = [], points[:]
-    cur = start_latlng
-    while unused:
-        nxt = min(unused, key=lambda p: haversine(cur, (p["lat"], p["lng"])))
-        route.append(nxt)
-        cur = (nxt["lat"], nxt["lng"])
-        unused.remove(nxt)
+    if not points:
+        return []
+    # Row/column 0 is the start; point i lives at index i + 1
+    P = np.array([start_latlng] + [(p["lat"], p["lng"]) for p in points], dtype=float)
+    if HAS_SCIPY and len(points) >= KDTREE_MIN_POINTS:
+        return _nearest_route_kdtree(P, points)
+    dist = haversine_matrix(P)
+    used = np.zeros(len(P), dtype=bool)
+    used[0] = True
+    route, cur = [], 0
+    for _ in range(len(points)):
+        row = np.where(used, np.inf, dist[cur])
+        cur = int(row.argmin())
+        used[cur] = True
+        route.append(points[cur - 1])
     return route
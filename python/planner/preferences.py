@@ -1,23 +1,50 @@
-import pandas as pd
-from math import floor, inf
+import csv
+import heapq
+from math import floor
 from pathlib import Path
 
 PREFS_PATH = Path(__file__).resolve().parents[1] / "prefs" / "preferences.csv"
 
+def _to_int(v):
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return 0
+
 def load_prefs():
-    prefs = pd.read_csv(PREFS_PATH)
-    prefs.columns = prefs.columns.str.strip()
-    for c in ("traveler_type","preferred_category","weight"):
-        if c not in prefs.columns:
-            raise ValueError(f"Missing column '{c}' in preferences.csv")
-    prefs["traveler_type"] = prefs["traveler_type"].astype("string").str.strip()
-    prefs["preferred_category"] = prefs["preferred_category"].astype("string").str.strip()
-    prefs["weight"] = pd.to_numeric(prefs["weight"], errors="coerce").fillna(0).astype(int)
-    prefs["cat_norm"] = prefs["preferred_category"].str.lower().str.replace(" ", "_")
+    """Rows of preferences.csv with stripped fields, int weights and a normalized category."""
+    with PREFS_PATH.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [c.strip() for c in reader.fieldnames or []]
+        for c in ("traveler_type","preferred_category","weight"):
+            if c not in reader.fieldnames:
+                raise ValueError(f"Missing column '{c}' in preferences.csv")
+        prefs = []
+        for row in reader:
+            t = (row["traveler_type"] or "").strip()
+            cat = (row["preferred_category"] or "").strip()
+            if not t or not cat:
+                continue
+            prefs.append({
+                "traveler_type": t,
+                "preferred_category": cat,
+                "weight": _to_int(row["weight"]),
+                "cat_norm": cat.lower().replace(" ", "_"),
+            })
     return prefs
 
+def _traveler_weights(prefs):
+    best = {}
+    for row in prefs:
+        cats = best.setdefault(row["traveler_type"].lower(), {})
+        cats[row["cat_norm"]] = max(cats.get(row["cat_norm"], row["weight"]), row["weight"])
+    return {t: sorted(cats.items(), key=lambda kv: (-kv[1], kv[0])) for t, cats in best.items()}
+
 PREFS = load_prefs()
 
+# traveler_type (lower-cased) → [(category, max weight), ...] sorted by weight desc, then name
+TRAVELER_WEIGHTS = _traveler_weights(PREFS)
+
 def proportional_quotas(weights, n_total):
     total_w = sum(w for _, w in weights)
     if total_w == 0 or n_total <= 0:
@@ -32,16 +59,9 @@ def proportional_quotas(weights, n_total):
     return base
 
 def build_weighted_sequence(traveler_type: str, days: int):
-    tprefs = PREFS.loc[PREFS["traveler_type"].str.lower() == traveler_type.lower()].copy()
-    if tprefs.empty:
+    weights = TRAVELER_WEIGHTS.get(traveler_type.lower())
+    if not weights:
         return []
-
-    cat_weights = (
-        tprefs.groupby(["cat_norm"], as_index=False)["weight"]
-             .max()
-             .sort_values(["weight","cat_norm"], ascending=[False,True])
-    )
-    weights = list(zip(cat_weights["cat_norm"], cat_weights["weight"]))
     weight_map = dict(weights)
 
     n_keep = max(int(days) * 3 - 1, 0)  # 3 slots/day minus 1 buffer
@@ -49,32 +69,23 @@ def build_weighted_sequence(traveler_type: str, days: int):
         return []
 
     quotas = proportional_quotas(weights, n_keep)
-    quotas = {c: q for c, q in quotas.items() if q > 0}
 
+    # Max-heap on (remaining quota, weight, name); avoid repeating the previous category
+    heap = [(-q, -weight_map[c], c) for c, q in quotas.items() if q > 0]
+    heapq.heapify(heap)
     result, last = [], None
-    while len(result) < n_keep and quotas:
-        cand = sorted(quotas.items(), key=lambda kv: (-kv[1], -weight_map.get(kv, -inf), kv))
-        placed = False
-        for cat, q in cand:
-            if cat != last and q > 0:
-                result.append(cat)
-                quotas[cat] = q - 1
-                if quotas[cat] <= 0: del quotas[cat]
-                last = cat
-                placed = True
-                break
-        if not placed:
-            cat, q = max(quotas.items(), key=lambda kv: (kv[1], weight_map.get(kv, -inf)))
-            result.append(cat)
-            quotas[cat] = q - 1
-            if quotas[cat] <= 0: del quotas[cat]
-            last = cat
+    while len(result) < n_keep and heap:
+        neg_q, neg_w, cat = heapq.heappop(heap)
+        if cat == last and heap:
+            nxt = heapq.heappop(heap)
+            heapq.heappush(heap, (neg_q, neg_w, cat))
+            neg_q, neg_w, cat = nxt
+        result.append(cat)
+        if neg_q < -1:
+            heapq.heappush(heap, (neg_q + 1, neg_w, cat))
+        last = cat
     return result[:n_keep]
 
 def sequence_to_days(seq, days):
-    per = []
-    i = 0
-    for _ in range(days):
-        per.append(seq[i:i+3])
-        i += 3
-    return per
+    # Always one entry per day, even if empty: the pipeline pairs them with forecasts
+    return [seq[i:i+3] for i in range(0, days * 3, 3)]
@@ -0,0 +1,55 @@
+import os
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Optional: requests-cache persists geocodes/forecasts across requests and restarts
+try:
+    from requests_cache import CachedSession
+    HAS_REQUESTS_CACHE = True
+except Exception:
+    HAS_REQUESTS_CACHE = False
+
+# Geocodes barely change; forecasts refresh every few hours upstream
+CACHE_EXPIRY = {
+    "nominatim.openstreetmap.org": 86400,
+    "api.openweathermap.org/geo": 86400,
+    "api.openweathermap.org/data/2.5/forecast": 3600,
+}
+
+# Shared session: keep-alive reuses TCP/TLS connections across calls
+if HAS_REQUESTS_CACHE:
+    SESSION = CachedSession(
+        # Relative names land in the platform user cache dir, not the process CWD
+        os.getenv("PLANNER_HTTP_CACHE", "travel_planner_http"),
+        backend="sqlite",
+        use_cache_dir=True,
+        expire_after=3600,
+        urls_expire_after=CACHE_EXPIRY,
+        # Keep the OpenWeather key out of cache keys and stored request URLs
+        ignored_parameters=["appid"],
+    )
+else:
+    SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+SESSION.headers.update({"User-Agent": "TravelPlanner/1.0", "Accept": "application/json"})
+
+# Optional: orjson decodes/encodes API payloads several times faster than json
+try:
+    import orjson
+    json_loads = orjson.loads
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+    HAS_ORJSON = True
+except Exception:
+    import json
+    json_loads = json.loads
+    def json_dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+    HAS_ORJSON = False
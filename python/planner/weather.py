@@ -1,7 +1,6 @@
 import os
-import requests
-from collections import defaultdict
 from datetime import datetime, timezone
+from .session import SESSION, json_loads
 
 OWM_KEY = os.getenv("OPENWEATHER_API_KEY")
 
@@ -11,32 +10,41 @@ def daily_forecast(lat: float, lng: float, days: int):
     """
     if not OWM_KEY:
         raise RuntimeError("OPENWEATHER_API_KEY not set")
+    import pandas as pd  # deferred: keeps the heavy import off the package's startup path
     url = "https://api.openweathermap.org/data/2.5/forecast"
-    r = requests.get(url, params={"lat": lat, "lon": lng, "appid": OWM_KEY, "units": "metric"}, timeout=25)
+    r = SESSION.get(url, params={"lat": lat, "lon": lng, "appid": OWM_KEY, "units": "metric"}, timeout=25)
     r.raise_for_status()
-    data = r.json()
+    data = json_loads(r.content)
 
-    buckets = defaultdict(lambda: {"temps": [], "pop": [], "weather": []})
-    for it in data.get("list", []):
-        dt = datetime.fromtimestamp(it["dt"], tz=timezone.utc).date()
-        main = it.get("main", {})
-        buckets[dt]["temps"].append(main.get("temp"))
-        buckets[dt]["pop"].append(it.get("pop", 0))
-        w = it.get("weather", [])
-        if w:
-            buckets[dt]["weather"].append(w[0].get("main"))
+    df = pd.DataFrame(
+        [{
+            "date": datetime.fromtimestamp(it["dt"], tz=timezone.utc).date(),
+            "temp": it.get("main", {}).get("temp"),
+            "pop": it.get("pop", 0),
+            "weather": (it.get("weather") or [{}])[0].get("main"),
+        } for it in data.get("list", [])],
+        columns=["date", "temp", "pop", "weather"],
+    )
+    if df.empty:
+        return []
+    df[["temp", "pop"]] = df[["temp", "pop"]].apply(pd.to_numeric)
 
-    out = []
-    for d in sorted(buckets.keys())[:days]:
-        rec = buckets[d]
-        temps = [t for t in rec["temps"] if t is not None]
-        pops  = [p for p in rec["pop"] if p is not None]
-        avg_temp = round(sum(temps)/len(temps), 1) if temps else None
-        avg_pop  = round(sum(pops)/len(pops), 2) if pops else None
-        cond = max(set(rec["weather"]), key=rec["weather"].count) if rec["weather"] else None
-        out.append({"date": d.isoformat(), "avg_temp_c": avg_temp, "avg_pop": avg_pop, "condition": cond})
+    agg = (
+        df.groupby("date", sort=True)
+          .agg(avg_temp_c=("temp", "mean"), avg_pop=("pop", "mean"), condition=("weather", _mode))
+          .round({"avg_temp_c": 1, "avg_pop": 2})
+          .head(days)
+    )
+    agg = agg.astype(object).where(agg.notna(), None).reset_index()
+    out = agg.to_dict("records")
+    for rec in out:
+        rec["date"] = rec["date"].isoformat()
     return out
 
+def _mode(s):
+    m = s.mode()
+    return m.iat[0] if not m.empty else None
+
 INDOOR_CATS = {"museums","cafes","shopping_malls","markets","temples","theaters","cultural_centers","aquariums","science_centers","libraries","art_galleries"}
 
 def prefer_indoor_if_rain(categories, forecast):
@@ -48,8 +56,9 @@ def prefer_indoor_if_rain(categories, forecast):
     rainy = forecast["avg_pop"] >= 0.5
     if not rainy:
         return categories
-    indoors = [c for c in categories if c in INDOOR_CATS]
-    outdoors = [c for c in categories if c not in INDOOR_CATS]
+    indoors, outdoors = [], []
+    for c in categories:
+        (indoors if c in INDOOR_CATS else outdoors).append(c)
     # morning/afternoon/evening: indoor first if rainy
     mixed = (indoors + outdoors)[:3]
     return mixed + categories[3:]
@@ -3,9 +3,15 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from math import ceil
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+import asyncio
+import threading
 import requests, os
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from cachetools import LRUCache
 
 # Optional: Groq import handled lazily
 try:
@@ -33,9 +39,25 @@ OPENWEATHER_KEY = "YOUR_KEY"
 GROQ_KEY = "YOUR_KEY"
 
 FSQ_SEARCH_URL = "https://places-api.foursquare.com/places/search"
-OW_GEOCODE_URL = "http://api.openweathermap.org/geo/1.0/direct"
+OW_GEOCODE_URL = "https://api.openweathermap.org/geo/1.0/direct"
 OW_ONECALL_URL = "https://api.openweathermap.org/data/3.0/onecall"
 
+# Shared session: keep-alive reuses TCP/TLS connections across calls
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=64,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+SESSION.headers.update({"User-Agent": "TravelPlanner/1.0"})
+
+# Blocking HTTP helpers run here so /plan can overlap them without blocking the event loop
+_POOL = ThreadPoolExecutor(max_workers=32)
+# Geocoding fans out from inside _POOL tasks, so it gets its own pool to avoid starving it
+_GEOCODE_POOL = ThreadPoolExecutor(max_workers=8)
+
 # -------------------------
 # Models
 # -------------------------
@@ -66,31 +88,63 @@ class PlanResponse(BaseModel):
 # -------------------------
 # Helpers
 # -------------------------
+# Geocodes keyed by normalized destination; failures are not cached
+_geocode_cache = LRUCache(maxsize=4096)
+# cachetools caches aren't thread-safe and geocode_location runs on worker threads
+_geocode_lock = threading.Lock()
+
 def geocode_location(place: str):
-    """Try OpenWeather geocoding, fallback to Nominatim."""
-    if OPENWEATHER_KEY:
-        try:
-            r = requests.get(OW_GEOCODE_URL, params={"q": place, "limit": 1, "appid": OPENWEATHER_KEY}, timeout=10)
-            if r.status_code == 200:
-                j = r.json()
-                if j:
-                    return j[0]["lat"], j[0]["lon"]
-        except Exception:
-            pass
-
-    # Nominatim fallback
+    """Geocode a destination, serving repeat lookups from an in-process cache."""
+    key = place.strip().lower()
+    with _geocode_lock:
+        hit = _geocode_cache.get(key)
+    if hit is not None:
+        return hit
+    geo = _geocode_uncached(key)
+    if geo is not None:
+        with _geocode_lock:
+            _geocode_cache[key] = geo
+    return geo
+
+def _geocode_owm(place: str):
+    if not OPENWEATHER_KEY:
+        return None
     try:
-        r = requests.get("https://nominatim.openstreetmap.org/search",
-                          params={"q": place, "format": "json", "limit": 1},
-                          headers={"User-Agent": "TravelPlanner/1.0"},
-                          timeout=10)
+        r = SESSION.get(OW_GEOCODE_URL, params={"q": place, "limit": 1, "appid": OPENWEATHER_KEY}, timeout=10)
+        if r.status_code == 200:
+            j = r.json()
+            if j:
+                return j[0]["lat"], j[0]["lon"]
+    except Exception:
+        pass
+    return None
+
+def _geocode_nominatim(place: str):
+    try:
+        r = SESSION.get("https://nominatim.openstreetmap.org/search",
+                         params={"q": place, "format": "json", "limit": 1},
+                         timeout=10)
         if r.status_code == 200:
             j = r.json()
             if j:
                 return float(j[0]["lat"]), float(j[0]["lon"])
     except Exception:
         pass
+    return None
 
+def _geocode_uncached(place: str):
+    """Query OpenWeather and Nominatim concurrently; the first non-empty answer wins."""
+    futs = [_GEOCODE_POOL.submit(fn, place) for fn in (_geocode_owm, _geocode_nominatim)]
+    try:
+        for fut in as_completed(futs, timeout=10):
+            geo = fut.result()
+            if geo:
+                return geo
+    except FuturesTimeout:
+        pass
+    finally:
+        for fut in futs:
+            fut.cancel()
     return None
 
 def fsq_search(lat, lng, traveler_type="solo", limit=20):
@@ -114,7 +168,7 @@ def fsq_search(lat, lng, traveler_type="solo", limit=20):
     }
     params = {"ll": f"{lat},{lng}", "limit": limit, "query": query}
 
-    r = requests.get(FSQ_SEARCH_URL, headers=headers, params=params, timeout=10)
+    r = SESSION.get(FSQ_SEARCH_URL, headers=headers, params=params, timeout=10)
     r.raise_for_status()
     data = r.json()
 
@@ -134,28 +188,38 @@ def fsq_search(lat, lng, traveler_type="solo", limit=20):
 def openweather_forecast(lat, lon, days=3):
     if not OPENWEATHER_KEY:
         raise RuntimeError("OPENWEATHER_API_KEY not set")
-    params = {"lat": lat, "lon": lon, "units": "metric", "appid": OPENWEATHER_KEY, "exclude": "minutely,hourly,alerts"}
-    r = requests.get(OW_ONECALL_URL, params=params, timeout=10)
+    params = {"lat": lat, "lon": lon, "units": "metric", "appid": OPENWEATHER_KEY, "exclude": "minutely,hourly,alerts,current"}
+    r = SESSION.get(OW_ONECALL_URL, params=params, timeout=10)
     r.raise_for_status()
     data = r.json()
     # return list of short descriptions for days
     forecasts = []
-    for i, d in enumerate(data.get("daily", [])[:days]):
+    for i, d in enumerate(data.get("daily", ())[:days]):
         desc = d.get("weather", [{}])[0].get("description", "Clear")
         temp = d.get("temp", {}).get("day")
         forecasts.append(f"{desc.capitalize()}" + (f", {temp}°C" if temp is not None else ""))
     return forecasts
 
+# Built on first use and reused, so its HTTP connection pool survives across requests
+_GROQ_CLIENT = None
+
+def _groq():
+    global _GROQ_CLIENT
+    if _GROQ_CLIENT is None and HAS_GROQ:
+        _GROQ_CLIENT = Groq(api_key=GROQ_KEY if GROQ_KEY else None)
+    return _GROQ_CLIENT
+
 def groq_generate_notes(req: PlanRequest, plan: List[DayPlan]):
     """Generate a friendly itinerary summary using Groq if available."""
     if not HAS_GROQ and not GROQ_KEY:
         return None
-    api_key = GROQ_KEY if GROQ_KEY else None
     try:
-        client = Groq(api_key=api_key) if HAS_GROQ else Groq(api_key=api_key)
+        client = _groq()
     except Exception:
         # If import exists but initialization fails, just return None
         return None
+    if client is None:
+        return None
 
     plan_text = "\n".join([f"Day {p.day} ({p.date}): {', '.join(p.activities)} (Weather: {p.weather})" for p in plan])
     prompt = f"""
@@ -182,42 +246,43 @@ Include:
 # Endpoint: /plan
 # -------------------------
 @app.post("/plan", response_model=PlanResponse)
-def plan(req: PlanRequest):
+async def plan(req: PlanRequest):
     if req.days <= 0:
         raise HTTPException(status_code=400, detail="days must be > 0")
+    loop = asyncio.get_running_loop()
 
     # Geocode destination if needed
     lat, lng = req.stay_lat, req.stay_lng
     if lat is None or lng is None:
-        geo = geocode_location(req.destination)
+        geo = await loop.run_in_executor(_POOL, geocode_location, req.destination)
         if not geo:
             raise HTTPException(status_code=400, detail=f"Could not geocode destination '{req.destination}'. Provide stay_lat & stay_lng")
         lat, lng = geo
 
-    # Fetch places (names) from Foursquare
-    try:
-        places = fsq_search(lat, lng, traveler_type=req.traveler_type, limit=20)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Foursquare error: {e}")
-
-    # Get weather (short descriptions) if available
-    try:
-        weather_list = openweather_forecast(lat, lng, days=req.days) if OPENWEATHER_KEY else [None]*req.days
-    except Exception:
+    # Fetch places (names) from Foursquare and weather (short descriptions) concurrently
+    places_fut = loop.run_in_executor(_POOL, fsq_search, lat, lng, req.traveler_type, 20)
+    weather_fut = loop.run_in_executor(_POOL, openweather_forecast, lat, lng, req.days)
+    places, weather_list = await asyncio.gather(places_fut, weather_fut, return_exceptions=True)
+    if isinstance(places, Exception):
+        raise HTTPException(status_code=502, detail=f"Foursquare error: {places}")
+    # Weather is optional: a missing key or upstream error leaves days without a forecast
+    if isinstance(weather_list, Exception):
         weather_list = [None] * req.days
 
     # Build per-day plan (distribute places evenly)
     plan_list: List[DayPlan] = []
+    today = datetime.now(timezone.utc).date()
+    dates = [(today + timedelta(days=i)).isoformat() for i in range(req.days)]
     chunk_size = ceil(len(places) / req.days) if places else 0
     for d in range(req.days):
         activities = places[d*chunk_size:(d+1)*chunk_size] if places else []
         if not activities:
             activities = ["Free exploration"]
         weather = weather_list[d] if weather_list and len(weather_list) > d else None
-        plan_list.append(DayPlan(day=d+1, date=(datetime.utcnow() + timedelta(days=d)).strftime("%Y-%m-%d"), activities=activities, weather=weather))
+        plan_list.append(DayPlan(day=d+1, date=dates[d], activities=activities, weather=weather))
 
     # Optional Groq summary
-    notes = groq_generate_notes(req, plan_list) if req.use_groq else None
+    notes = await loop.run_in_executor(_POOL, groq_generate_notes, req, plan_list) if req.use_groq else None
 
     # Return shape expected by frontend: destination / traveler_type / days / plan / notes
     return PlanResponse(destination=req.destination, traveler_type=req.traveler_type, days=req.days, plan=plan_list, notes=notes)